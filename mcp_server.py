@@ -1,21 +1,39 @@
 import json
 import sys
+import functools
 import os
+import re
 import signal
+import socket
+import selectors
+import atexit
 import time
+import base64
+import datetime
+import decimal
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.conversion import MySQLConverter
+try:
+    import orjson
+except ImportError:
+    orjson = None
 import logging
-import traceback
-from datetime import datetime
+from collections import OrderedDict
 import threading
-import platform
+from concurrent.futures import ThreadPoolExecutor
+import types
+import mmap
+import stat
+import shutil
+import tempfile
 
-# Print startup message to stderr
-sys.stderr.write(f"""
+# Print startup debugging information to stderr when DEBUG is set
+if os.environ.get('DEBUG'):
+    sys.stderr.write(f"""
 === MCP MySQL Server Debugging Information ===
-Python version: {platform.python_version()}
-Platform: {platform.platform()}
+Python version: {sys.version.split()[0]}
+Platform: {sys.platform}
 Current directory: {os.getcwd()}
 Executable path: {sys.executable}
 Arguments: {sys.argv}
@@ -28,584 +46,1482 @@ Environment:
   DB_DATABASE: {os.environ.get('DB_DATABASE', 'Not set')}
 =================================================
 """)
-sys.stderr.flush()
+    sys.stderr.flush()
+
+_date_cache = (None, '')
+
+def utc_timestamp(t):
+    """Format a time.time() value as ISO-8601 UTC, re-formatting the date part once per second"""
+    global _date_cache
+    second = int(t)
+    cached_second, date = _date_cache
+    if second != cached_second:
+        date = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(second))
+        _date_cache = (second, date)
+    return f"{date}.{int((t - second) * 1e6):06d}Z"
+
+class LogFormatter(logging.Formatter):
+    """Formatter with ISO-8601 UTC timestamps"""
+    
+    def formatTime(self, record, datefmt=None):
+        return utc_timestamp(record.created)
+
+log_formatter = LogFormatter('%(asctime)s [%(name)s] [%(levelname)s] %(message)s')
 
 # Configure logging
+root_handler = logging.StreamHandler()
+root_handler.setFormatter(log_formatter)
 logging.basicConfig(
     level=logging.DEBUG if os.environ.get('DEBUG') else logging.INFO,
-    format='%(asctime)s [%(name)s] [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%dT%H:%M:%S.%fZ'
+    handlers=[root_handler]
 )
 logger = logging.getLogger('mysql-aqara')
+# Checked once so per-message debug lines cost a single branch when DEBUG is off
+LOG_DEBUG = logger.isEnabledFor(logging.DEBUG)
 
-# Add stderr handler for improved Docker logging
-stderr_handler = logging.StreamHandler(sys.stderr)
-stderr_handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s] [%(levelname)s] %(message)s'))
-logger.addHandler(stderr_handler)
+# JSON encoding: orjson when installed (C, returns bytes), stdlib json otherwise
+def json_default(obj):
+    """Serialize column values the JSON encoder has no native form for"""
+    if isinstance(obj, decimal.Decimal):
+        # As a string so no precision is lost
+        return str(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        # TIME columns, in MySQL's [-]HH:MM:SS[.ffffff] form
+        sign = '-' if obj < datetime.timedelta(0) else ''
+        seconds, microseconds = divmod(abs(obj) // datetime.timedelta(microseconds=1), 1000000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        fraction = f".{microseconds:06d}" if microseconds else ''
+        return f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}{fraction}"
+    if isinstance(obj, (bytes, bytearray)):
+        # Binary columns: text when it decodes, base64 otherwise
+        try:
+            return obj.decode('utf-8')
+        except UnicodeDecodeError:
+            return base64.b64encode(obj).decode('ascii')
+    if isinstance(obj, (set, frozenset)):
+        # SET columns
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def json_dumps(obj):
+        return orjson.dumps(obj, default=json_default)
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(',', ':'), default=json_default).encode('utf-8')
+    json_loads = json.loads
+
+class FastConverter(MySQLConverter):
+    """Converter returning JSON-ready values for DATETIME/TIMESTAMP and DECIMAL columns.
+    
+    Skips building datetime/Decimal objects only to serialize them again; DECIMAL stays
+    a string so no precision is lost.
+    """
+    
+    def _DATETIME_to_python(self, value, dsc=None):
+        if value.startswith(b'0000-00-00'):
+            return None
+        return value.decode('ascii').replace(' ', 'T')
+    
+    _TIMESTAMP_to_python = _DATETIME_to_python
+    
+    def _NEWDECIMAL_to_python(self, value, dsc=None):
+        return value.decode('ascii')
+    
+    _DECIMAL_to_python = _NEWDECIMAL_to_python
 
 # Global variables
 db_config = None
-db_connection = None
-last_activity_time = time.time()
+db_pool = None
+DEFAULT_POOL_SIZE = 8
+
+def pool_size_from_env():
+    """Read MYSQL_POOL_SIZE, falling back to DEFAULT_POOL_SIZE when it isn't a number"""
+    value = os.environ.get('MYSQL_POOL_SIZE')
+    if value is None:
+        return DEFAULT_POOL_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        logger.warning("Invalid MYSQL_POOL_SIZE %r, using %s", value, DEFAULT_POOL_SIZE)
+        return DEFAULT_POOL_SIZE
+    # mysql-connector rejects pools larger than CNX_POOL_MAXSIZE (32), and the pool has
+    # one connection more than there are workers
+    return min(max(size, 1), pooling.CNX_POOL_MAXSIZE - 1)
+
+POOL_SIZE = pool_size_from_env()
+_local = threading.local()  # per-thread connection checked out of db_pool
+checked_out = set()  # connections held by threads, returned on cleanup
+checked_out_lock = threading.Lock()
+executor = None  # worker threads running tool calls, created by main()
+EMPTY_PARAMS = types.MappingProxyType({})  # shared read-only default for missing params
+PREPARED_CACHE_SIZE = 128  # per connection, well under MySQL's max_prepared_stmt_count
+STREAM_CHUNK_SIZE = 1000  # rows fetched per round when streaming query results
+STREAM_SPOOL_SIZE = 8 * 1024 * 1024  # bytes of a streamed response held in memory before spilling to disk
+CONNECT_TIMEOUT = 10  # seconds to wait for the MySQL handshake
+# TCP keepalive probes: idle seconds before the first, seconds between probes, probes before giving up
+TCP_KEEPALIVE = ((getattr(socket, 'TCP_KEEPIDLE', None), 30),
+                 (getattr(socket, 'TCP_KEEPINTVL', None), 10),
+                 (getattr(socket, 'TCP_KEEPCNT', None), 3))
+stdout_lock = threading.Lock()
+
+# list_tables/describe_table results keyed by (database,) and (database, table)
+SCHEMA_CACHE_SIZE = 256
+SCHEMA_CACHE_TTL = 30  # seconds; bounds staleness from schema changes made by other clients
+schema_cache = OrderedDict()
+schema_cache_lock = threading.Lock()
+
+# Leading keyword of a statement; matching stops there instead of scanning the whole SQL
+SQL_KIND_RE = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER|RENAME|TRUNCATE|USE|SHOW|DESCRIBE)\b', re.IGNORECASE)
+SCHEMA_CHANGING_KINDS = frozenset(['CREATE', 'DROP', 'ALTER', 'RENAME'])
+IDENTIFIER_RE = re.compile(r'[A-Za-z0-9_$]{1,64}')
+NAMED_PARAM_RE = re.compile(r'%\((\w+)\)s')
+# Quoted strings, quoted identifiers and comments, whose semicolons don't end a statement, or a semicolon that does
+STATEMENT_TOKEN_RE = re.compile(r"""'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`|(?:--\s|\#)[^\n]*|/\*.*?\*/|;""", re.DOTALL)
+last_activity_time = time.monotonic()
 KEEP_ALIVE_INTERVAL = 10  # seconds, reduced from 30
 TIMEOUT = 300  # seconds
 running = True
+stop_event = threading.Event()  # set on shutdown to wake the keep-alive thread
 initialized = False
 
-# Check for environment variables
-if all(k in os.environ for k in ['DB_HOST', 'DB_USER', 'DB_PASSWORD']):
-    logger.info("Found database connection parameters in environment variables")
-    db_config = {
-        'host': os.environ['DB_HOST'],
-        'user': os.environ['DB_USER'],
-        'password': os.environ['DB_PASSWORD'],
-        'database': os.environ.get('DB_DATABASE', ''),  # Database is optional
-        'charset': 'utf8mb4',
-        'collation': 'utf8mb4_general_ci'
+# Keep-alive notification, split around the timestamp
+KEEP_ALIVE_PREFIX = b'{"jsonrpc":"2.0","method":"$/alive","params":{"timestamp":"'
+KEEP_ALIVE_SUFFIX = b'"}}'
+
+def response_template(result):
+    """Pre-serialize a constant result as (prefix, suffix) around the request id"""
+    result_json = json_dumps(result)
+    return (b'{"jsonrpc":"2.0","id":', b',"result":' + result_json + b'}')
+
+def constant_response(template, request_id):
+    """Build a serialized response from a template and the request id"""
+    prefix, suffix = template
+    return prefix + json_dumps(request_id) + suffix
+
+# Error responses, split around the id and message
+ERROR_PREFIXES = {
+    code: b',"error":{"code":' + str(code).encode('ascii') + b',"message":'
+    for code in (-32700, -32600, -32601, -32603)
+}
+
+def error_response(request_id, code, message):
+    """Build a serialized JSON-RPC error response"""
+    return b'{"jsonrpc":"2.0","id":' + json_dumps(request_id) + ERROR_PREFIXES[code] + json_dumps(message) + b'}}'
+
+# Server capabilities returned by initialize, serialized once at startup
+INITIALIZE_RESPONSE = response_template({
+    'capabilities': {
+        'textDocumentSync': 1,
+        'completionProvider': {
+            'resolveProvider': True,
+            'triggerCharacters': ['.']
+        },
+        'hoverProvider': True
+    },
+    'serverInfo': {
+        'name': 'mysql-aqara',
+        'version': '1.0.0'
     }
-    logger.info(f"Using database: {db_config['host']}/{db_config['database'] or 'None'} as {db_config['user']}")
-    # Try to auto-connect if environment variables are set
-    try:
-        if db_config['database']:  # Only if database name is provided
-            conn = mysql.connector.connect(**db_config)
-            db_connection = conn
-            logger.info("Auto-connected to database using environment variables")
-    except Error as e:
-        logger.error(f"Failed to auto-connect to database: {e}")
-        db_connection = None
+})
+
+# shutdown has a null result
+SHUTDOWN_RESPONSE = response_template(None)
+
+# Batch entries that aren't request objects
+INVALID_REQUEST_RESPONSE = error_response(None, -32600, "Invalid Request")
 
 # Log startup information
-logger.info(f"MCP Server starting up. Python version: {platform.python_version()}")
-logger.info(f"Current working directory: {os.getcwd()}")
-logger.info(f"Script path: {os.path.abspath(__file__)}")
+logger.info("MCP Server starting up. Python version: %s", sys.version.split()[0])
+logger.info("Current working directory: %s", os.getcwd())
+logger.info("Script path: %s", os.path.abspath(__file__))
 
 def signal_handler(signum, frame):
     """Handle termination signals"""
     global running
-    logger.info(f"Received termination signal {signum}, cleaning up...")
+    logger.info("Received termination signal %s, cleaning up...", signum)
     running = False
-    cleanup()
+    stop_event.set()
+    # cleanup() runs from atexit once SystemExit has unwound the main thread;
+    # calling it here could deadlock on a lock the interrupted code holds
     sys.exit(0)
 
 def cleanup():
-    """Cleanup resources before exit"""
-    global db_connection
+    """Cleanup resources before exit; safe to call more than once"""
+    global db_pool
+    if db_pool is None and not checked_out:
+        return
     logger.debug("Performing cleanup...")
-    if db_connection:
+    _release_conn()
+    
+    # Return connections still held by worker threads so the pool can close them
+    with checked_out_lock:
+        conns = list(checked_out)
+        checked_out.clear()
+    for conn in conns:
         try:
-            db_connection.close()
-            logger.info("Database connection closed")
+            conn.close()
         except Error as e:
-            logger.error(f"Error closing database connection: {e}")
+            logger.error("Error releasing database connection: %s", e)
+    
+    if db_pool:
+        close_pool(db_pool)
+        db_pool = None
     logger.info("Cleanup completed")
 
-def keep_alive_thread():
-    """Background thread to send keep-alive messages"""
+def close_pool(pool):
+    """Close all idle connections held by a connection pool"""
+    try:
+        closed = pool._remove_connections()
+        logger.info("Connection pool closed (%s connections)", closed)
+    except Error as e:
+        logger.error("Error closing connection pool: %s", e)
+
+def _keep_alive_loop():
+    """Background thread to send keep-alive messages where stdin can't be select()ed"""
     global running, last_activity_time
     logger.info("Keep alive thread started")
     
-    while running:
+    # Sleep until the next keep-alive is due instead of polling every second
+    while not stop_event.wait(max(0.01, last_activity_time + KEEP_ALIVE_INTERVAL - time.monotonic())):
         try:
-            current_time = time.time()
-            elapsed = current_time - last_activity_time
+            elapsed = time.monotonic() - last_activity_time
             
-            if elapsed > KEEP_ALIVE_INTERVAL:
-                logger.info(f"Sending keep-alive after {elapsed:.1f}s of inactivity")
+            if elapsed >= KEEP_ALIVE_INTERVAL:
+                logger.info("Sending keep-alive after %.1fs of inactivity", elapsed)
                 send_keep_alive()
-                
-            time.sleep(1)
         except Exception as e:
-            logger.error(f"Error in keep-alive thread: {e}", exc_info=True)
+            logger.error("Error in keep-alive thread: %s", e, exc_info=LOG_DEBUG)
+
+def write_message(payload):
+    """Write one serialized JSON-RPC message to stdout as a single line"""
+    stdout = sys.stdout.buffer
+    with stdout_lock:
+        stdout.write(payload + b"\n")
+        stdout.flush()
+
+def write_messages(payloads):
+    """Write several serialized JSON-RPC messages to stdout with a single write and flush"""
+    payloads.append(b"")
+    data = b"\n".join(payloads)
+    stdout = sys.stdout.buffer
+    with stdout_lock:
+        stdout.write(data)
+        stdout.flush()
+    if LOG_DEBUG:
+        logger.debug("Responses sent: %r", data)
+
+def write_stream(pieces):
+    """Write a JSON-RPC message produced in pieces to stdout as a single line.
+    
+    The pieces are spooled first so rows are fetched and serialized without holding
+    stdout_lock, which would block every other response and the stdin loop meanwhile.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_SIZE) as spool:
+        for piece in pieces:
+            spool.write(piece)
+        spool.write(b"\n")
+        spool.seek(0)
+        stdout = sys.stdout.buffer
+        with stdout_lock:
+            shutil.copyfileobj(spool, stdout)
+            stdout.flush()
 
 def send_keep_alive():
     """Send keep-alive message to prevent timeout"""
     global last_activity_time
-    last_activity_time = time.time()
+    last_activity_time = time.monotonic()
     
     try:
-        response = {
-            "jsonrpc": "2.0",
-            "method": "$/alive",
-            "params": {"timestamp": datetime.utcnow().isoformat()}
-        }
-        print(json.dumps(response), flush=True)
-        sys.stderr.write("Keep-alive sent\n")
-        sys.stderr.flush()
+        timestamp = utc_timestamp(time.time()).encode('ascii')
+        write_message(KEEP_ALIVE_PREFIX + timestamp + KEEP_ALIVE_SUFFIX)
+        if LOG_DEBUG:
+            logger.debug("Keep-alive sent")
     except Exception as e:
-        logger.error(f"Error sending keep-alive: {e}", exc_info=True)
+        logger.error("Error sending keep-alive: %s", e, exc_info=LOG_DEBUG)
 
 def connect_db(host, user, password, database=""):
-    """Establish a connection to the MySQL database"""
-    global db_config, db_connection
+    """Establish a connection pool to the MySQL database"""
+    global db_config, db_pool
     try:
-        logger.info(f"Connecting to database at {host}/{database} as {user}")
+        logger.info("Connecting to database at %s/%s as %s", host, database, user)
         db_config = {
             'host': host,
             'user': user,
             'password': password,
             'database': database,
             'charset': 'utf8mb4',
-            'collation': 'utf8mb4_general_ci'
+            'collation': 'utf8mb4_general_ci',
+            # Decode rows in the C extension; falls back to pure Python if it isn't installed
+            'use_pure': False,
+            'connection_timeout': CONNECT_TIMEOUT,
+            # Each worker keeps its connection between calls, so reads must not leave a
+            # transaction (and its snapshot and metadata locks) open behind them
+            'autocommit': True
         }
+        if not mysql.connector.HAVE_CEXT:
+            # Values are converted in Python anyway without the C extension
+            db_config['converter_class'] = FastConverter
         
-        # Test the connection
-        logger.debug("Testing database connection...")
+        # Connect without database unless one is specified
+        pool_config = db_config.copy()
+        if not database:
+            del pool_config['database']
         
-        # Create connection with database if specified
-        if database:
-            test_conn = mysql.connector.connect(**db_config)
-        else:
-            # Connect without database
-            config_without_db = db_config.copy()
-            del config_without_db['database']
-            test_conn = mysql.connector.connect(**config_without_db)
+        # Creating the pool opens all of its connections, which also tests the credentials.
+        # Session reset is skipped since tools don't rely on per-session state.
+        # One connection per worker, plus one kept free for tool calls in batches run inline
+        logger.debug("Creating connection pool (size=%s)...", POOL_SIZE + 1)
+        new_pool = pooling.MySQLConnectionPool(
+            pool_name="aqara",
+            pool_size=POOL_SIZE + 1,
+            pool_reset_session=False,
+            **pool_config
+        )
         
-        # Save the connection
-        db_connection = test_conn
+        # Replace any previous pool
+        _release_conn()
+        if db_pool:
+            close_pool(db_pool)
+        db_pool = new_pool
+        clear_schema_cache()
         
         logger.info("Database connection established successfully")
         return {"success": True, "message": "Connected to database successfully"}
     except Error as e:
         error_details = str(e)
-        logger.error(f"Database connection error: {error_details}", exc_info=True)
+        logger.error("Database connection error: %s", error_details, exc_info=LOG_DEBUG)
         return {"success": False, "error": error_details}
     except Exception as e:
-        logger.error(f"Unexpected error connecting to database: {str(e)}", exc_info=True)
+        logger.exception("Unexpected error connecting to database: %s", e)
         return {"success": False, "error": f"Unexpected error: {str(e)}"}
 
-def create_or_modify_table(query, bind_vars=None):
-    """Create or modify a table with raw SQL"""
-    global db_connection
+def _tune_socket(conn):
+    """Disable Nagle's algorithm and turn on TCP keepalive for a pooled connection.
     
-    if not db_connection:
-        error_msg = "Database not connected. Use connect_db first."
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+    Without TCP_NODELAY a small query can wait on the delayed ACK of the previous
+    one; keepalive notices a dead server in about a minute instead of hours.
+    Only the pure-Python driver exposes its socket; the C extension's is left as is.
+    """
+    sock = getattr(getattr(conn._cnx, '_socket', None), 'sock', None)
+    if sock is None or sock.family not in (socket.AF_INET, socket.AF_INET6):
+        return
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for option, value in TCP_KEEPALIVE:
+            if option is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+    except OSError as e:
+        logger.warning("Could not set TCP socket options: %s", e)
+
+def _get_conn():
+    """Return this thread's pooled connection, checking it out on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pool is not db_pool:
+        _release_conn()
+        conn = db_pool.get_connection()
+        _tune_socket(conn)
+        _local.conn = conn
+        _local.pool = db_pool
+        with checked_out_lock:
+            checked_out.add(conn)
+    else:
+        # Recover from server-side idle disconnects without a full reconnect per call
+        connection_id = conn.connection_id
+        conn.ping(reconnect=True, attempts=1)
+        if connection_id != conn.connection_id:
+            # Prepared statements don't survive a reconnect
+            conn._prep_cache = OrderedDict()
+            _tune_socket(conn)
+    if getattr(_local, 'in_batch', False) and not conn.in_transaction:
+        # The statements of a JSON-RPC batch share one transaction, committed when it ends
+        conn.start_transaction()
+    return conn
+
+def _release_conn():
+    """Return this thread's connection to the pool it was checked out from"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        return
+    _local.conn = None
+    with checked_out_lock:
+        checked_out.discard(conn)
+    try:
+        if conn.in_transaction:
+            _local.pending_writes = 0
+            conn.commit()
+        conn.close()
+        if _local.pool is not db_pool:
+            # The pool was replaced meanwhile; don't leave the connection idle in it
+            _local.pool._remove_connections()
+    except Error as e:
+        logger.error("Error releasing database connection: %s", e)
+
+def _commit(conn):
+    """Commit an open transaction, or leave it to the end of the JSON-RPC batch running on this thread"""
+    if getattr(_local, 'in_batch', False):
+        _local.pending_writes += 1
+    elif conn.in_transaction:
+        conn.commit()
+
+def _shared_cursor(conn):
+    """Return the connection's buffered cursor, reused by every plain statement it runs"""
+    cursor = getattr(conn, '_shared_cursor', None)
+    if cursor is None:
+        cursor = conn._shared_cursor = conn.cursor(buffered=True)
+    return cursor
+
+def _fetch_all(cursor):
+    """Fetch every row from the shared cursor, then drop its buffered copy of them"""
+    rows = cursor.fetchall()
+    # The cursor lives as long as the connection, so it would keep the result set alive too
+    cursor.reset()
+    return rows
+
+def _execute_prepared(conn, query, params):
+    """Execute query through a cached server-side prepared statement"""
+    cache = getattr(conn, '_prep_cache', None)
+    if cache is None:
+        cache = conn._prep_cache = OrderedDict()
+    
+    cursor = cache.get(query)
+    if cursor is None:
+        cursor = conn.cursor(prepared=True)
+        cache[query] = cursor
+        if len(cache) > PREPARED_CACHE_SIZE:
+            _, evicted = cache.popitem(last=False)
+            _close_prepared(evicted)
+    else:
+        cache.move_to_end(query)
+    
+    try:
+        cursor.execute(query, tuple(params))
+    except Error:
+        cache.pop(query, None)
+        _close_prepared(cursor)
+        raise
+    return cursor
+
+def _close_prepared(cursor):
+    """Close a prepared cursor dropped from the cache, deallocating its server-side statement"""
+    try:
+        cursor.close()
+    except Error as e:
+        logger.warning("Error closing prepared statement: %s", e)
+
+@functools.lru_cache(maxsize=512)
+def compile_named_params(query):
+    """Rewrite %(name)s placeholders as positional %s for a prepared statement.
+    
+    Returns (query, names), or None when the query has no named placeholders or
+    other % signs that make the rewrite unsafe.
+    """
+    names = tuple(NAMED_PARAM_RE.findall(query))
+    positional = NAMED_PARAM_RE.sub('%s', query)
+    if not names or positional.count('%') != len(names):
+        return None
+    return positional, names
+
+def _prepared_args(query, bind_vars):
+    """Return (query, params) to run bind_vars as a prepared statement, or None to bind client-side"""
+    if isinstance(bind_vars, (list, tuple)):
+        return query, bind_vars
+    if isinstance(bind_vars, dict):
+        compiled = compile_named_params(query)
+        if compiled is not None and all(name in bind_vars for name in compiled[1]):
+            positional, names = compiled
+            return positional, [bind_vars[name] for name in names]
+    return None
+
+def sql_kind(query):
+    """Return the upper-cased leading keyword of a SQL statement, or None"""
+    match = SQL_KIND_RE.match(query)
+    return match.group(1).upper() if match else None
+
+@functools.lru_cache(maxsize=256)
+def split_statements(query):
+    """Split SQL text into its statements, ignoring semicolons in quotes and comments"""
+    statements = []
+    start = 0
+    for match in STATEMENT_TOKEN_RE.finditer(query):
+        if match.group() == ';':
+            statements.append(query[start:match.start()])
+            start = match.end()
+    statements.append(query[start:])
+    return tuple(statement.strip() for statement in statements if statement.strip())
+
+@functools.lru_cache(maxsize=512)
+def quote_identifier(name):
+    """Validate a table name (optionally schema-qualified) and return it backtick-quoted"""
+    parts = name.split('.')
+    if len(parts) > 2 or not all(IDENTIFIER_RE.fullmatch(part) for part in parts):
+        raise ValueError(f"Invalid table name: {name!r}")
+    return '.'.join(f"`{part}`" for part in parts)
+
+@functools.lru_cache(maxsize=512)
+def describe_statement(name):
+    """Build the DESCRIBE statement for a table name, once per distinct name"""
+    return f"DESCRIBE {quote_identifier(name)}"
+
+def schema_cache_get(key):
+    """Return a cached schema lookup, or None on a miss or once it has expired"""
+    with schema_cache_lock:
+        entry = schema_cache.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del schema_cache[key]
+            return None
+        schema_cache.move_to_end(key)
+        return value
+
+def schema_cache_put(key, value):
+    """Cache a schema lookup, evicting the least recently used entry when full"""
+    with schema_cache_lock:
+        schema_cache[key] = (time.monotonic() + SCHEMA_CACHE_TTL, value)
+        if len(schema_cache) > SCHEMA_CACHE_SIZE:
+            schema_cache.popitem(last=False)
+
+def clear_schema_cache():
+    """Drop all cached schema lookups"""
+    with schema_cache_lock:
+        schema_cache.clear()
+
+NOT_CONNECTED_ERROR = "Database not connected. Use connect_db first."
+# Returned by reference; results are only read once a tool returns them
+NOT_CONNECTED_RESULT = {"success": False, "error": NOT_CONNECTED_ERROR}
+# Calls run on whichever pooled connection is free, so USE would only switch one of them
+USE_NOT_SUPPORTED_ERROR = "USE is not supported; call connect_db with the database to switch to instead"
+USE_NOT_SUPPORTED_RESULT = {"success": False, "error": USE_NOT_SUPPORTED_ERROR}
+
+def _needs_db(func):
+    """Return NOT_CONNECTED_RESULT instead of calling func while there is no pool"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if db_pool is None:
+            logger.error(NOT_CONNECTED_ERROR)
+            return NOT_CONNECTED_RESULT
+        return func(*args, **kwargs)
+    return wrapper
+
+@_needs_db
+def create_or_modify_table(query, bind_vars=None, conn=None):
+    """Create or modify a table with raw SQL.
+    
+    Several statements are sent in one round trip but don't run atomically: when one
+    fails, the statements before it stay applied and the error says which one failed.
+    """
+    statements = split_statements(query)
+    if any(sql_kind(statement) == 'USE' for statement in statements):
+        logger.error(USE_NOT_SUPPORTED_ERROR)
+        return USE_NOT_SUPPORTED_RESULT
     
     try:
-        cursor = db_connection.cursor()
+        if conn is None:
+            conn = _get_conn()
+        cursor = _shared_cursor(conn)
         
-        if bind_vars:
+        if len(statements) > 1:
+            # Several statements (e.g. DROP ...; CREATE ...) go to the server in one round trip
+            applied = 0
+            try:
+                results = cursor.execute(query, bind_vars, multi=True) if bind_vars else cursor.execute(query, multi=True)
+                for _ in results:
+                    applied += 1
+            except Error as e:
+                error_msg = f"Statement {applied + 1} of {len(statements)} failed: {e}"
+                if applied:
+                    error_msg += f" (the {applied} before it were applied)"
+                logger.error("Error creating/modifying table: %s", error_msg)
+                clear_schema_cache()
+                return {"success": False, "error": error_msg}
+        elif bind_vars:
             cursor.execute(query, bind_vars)
         else:
             cursor.execute(query)
             
-        db_connection.commit()
-        cursor.close()
+        _commit(conn)
+        clear_schema_cache()
         
-        logger.info(f"Table creation/modification query executed successfully")
+        logger.info("Table creation/modification query executed successfully")
         return {"success": True, "message": "Query executed successfully"}
     except Error as e:
-        logger.error(f"Error creating/modifying table: {e}")
+        logger.error("Error creating/modifying table: %s", e)
         return {"success": False, "error": str(e)}
 
-def execute_query(query, bind_vars=None):
-    """Execute a SELECT query"""
-    global db_connection
+@_needs_db
+def execute_query(query, bind_vars=None, stream=False, page_size=None, conn=None):
+    """Execute a SELECT query.
     
-    if not db_connection:
-        error_msg = "Database not connected. Use connect_db first."
+    With stream, rows are returned as a generator of chunks; with page_size, as a
+    generator of pages sent to the client as $/partialResult notifications.
+    """
+    if page_size is not None and (not isinstance(page_size, int) or isinstance(page_size, bool) or page_size < 1):
+        error_msg = f"page_size must be a positive integer, got {page_size!r}"
         logger.error(error_msg)
         return {"success": False, "error": error_msg}
+    if sql_kind(query) == 'USE':
+        logger.error(USE_NOT_SUPPORTED_ERROR)
+        return USE_NOT_SUPPORTED_RESULT
     
     try:
-        cursor = db_connection.cursor(dictionary=True)
+        if conn is None:
+            conn = _get_conn()
         
-        if bind_vars:
-            cursor.execute(query, bind_vars)
+        if page_size:
+            cursor = conn.cursor()
+            
+            if bind_vars:
+                cursor.execute(query, bind_vars)
+            else:
+                cursor.execute(query)
+            
+            logger.info("Query executed successfully, paging results: %s", query)
+            return {"success": True, "pages": _iter_row_chunks(conn, cursor, page_size)}
+        
+        if stream:
+            # Unbuffered cursor: rows stay on the server until fetched
+            cursor = conn.cursor()
+            
+            if bind_vars:
+                cursor.execute(query, bind_vars)
+            else:
+                cursor.execute(query)
+            
+            logger.info("Query executed successfully, streaming results: %s", query)
+            return {"success": True, "results": _iter_row_chunks(conn, cursor)}
+        
+        prepared = _prepared_args(query, bind_vars) if bind_vars else None
+        if prepared:
+            # Reuse a prepared statement (cursor stays cached)
+            cursor = _execute_prepared(conn, *prepared)
+            columns = cursor.column_names
+            rows = cursor.fetchall()
         else:
-            cursor.execute(query)
+            cursor = _shared_cursor(conn)
             
-        results = cursor.fetchall()
-        cursor.close()
+            if bind_vars:
+                cursor.execute(query, bind_vars)
+            else:
+                cursor.execute(query)
+                
+            columns = cursor.column_names
+            rows = _fetch_all(cursor)
         
-        logger.info(f"Query executed successfully: {query}")
+        # Tuple rows zipped here are cheaper than the driver's dictionary cursor
+        results = [dict(zip(columns, row)) for row in rows]
+        
+        logger.info("Query executed successfully: %s", query)
         return {"success": True, "results": results}
     except Error as e:
-        logger.error(f"Error executing query: {e}")
+        logger.error("Error executing query: %s", e)
         return {"success": False, "error": str(e)}
 
-def execute_command(query, bind_vars=None):
-    """Execute INSERT, UPDATE, or DELETE queries"""
-    global db_connection
-    
-    if not db_connection:
-        error_msg = "Database not connected. Use connect_db first."
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+def _iter_row_chunks(conn, cursor, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield lists of row dicts from an unbuffered cursor, chunk_size rows at a time"""
+    columns = cursor.column_names
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield [dict(zip(columns, row)) for row in rows]
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            # An aborted stream leaves rows unread on the connection
+            conn.consume_results()
+
+@_needs_db
+def execute_command(query, bind_vars=None, batch=None, conn=None):
+    """Execute INSERT, UPDATE, or DELETE queries, optionally once per row of batch"""
+    kind = sql_kind(query)
+    if kind == 'USE':
+        logger.error(USE_NOT_SUPPORTED_ERROR)
+        return USE_NOT_SUPPORTED_RESULT
     
     try:
-        cursor = db_connection.cursor()
+        if conn is None:
+            conn = _get_conn()
         
-        if bind_vars:
-            cursor.execute(query, bind_vars)
+        # A list of bind variable sets is a batch
+        if not batch and isinstance(bind_vars, list) and bind_vars and isinstance(bind_vars[0], (list, tuple, dict)):
+            batch, bind_vars = bind_vars, None
+        
+        prepared = _prepared_args(query, bind_vars) if bind_vars and not batch else None
+        if batch:
+            # One round trip for all rows; INSERT ... VALUES is rewritten as a multi-row INSERT
+            cursor = conn.cursor()
+            cursor.executemany(query, batch)
+            affected_rows = cursor.rowcount
+            logger.info("Batch of %s rows executed", len(batch))
+            _commit(conn)
+            cursor.close()
+        elif prepared:
+            # Reuse a prepared statement (cursor stays cached)
+            cursor = _execute_prepared(conn, *prepared)
+            affected_rows = cursor.rowcount
+            _commit(conn)
         else:
-            cursor.execute(query)
+            cursor = _shared_cursor(conn)
             
-        affected_rows = cursor.rowcount
-        db_connection.commit()
-        cursor.close()
+            if bind_vars:
+                cursor.execute(query, bind_vars)
+            else:
+                cursor.execute(query)
+                
+            affected_rows = cursor.rowcount
+            _commit(conn)
+        
+        if kind in SCHEMA_CHANGING_KINDS:
+            clear_schema_cache()
         
-        logger.info(f"Command executed successfully: {query} (Affected rows: {affected_rows})")
+        logger.info("Command executed successfully: %s (Affected rows: %s)", query, affected_rows)
         return {"success": True, "affected_rows": affected_rows}
     except Error as e:
-        logger.error(f"Error executing command: {e}")
+        logger.error("Error executing command: %s", e)
         return {"success": False, "error": str(e)}
 
-def list_tables():
-    """List all tables in the connected database"""
-    global db_connection
-    
-    if not db_connection:
-        error_msg = "Database not connected. Use connect_db first."
+def execute_many(query, rows, conn=None):
+    """Execute an INSERT, UPDATE, or DELETE query once per row in a single round trip"""
+    if not rows or not isinstance(rows, (list, tuple)):
+        error_msg = "rows must be a non-empty array of bind variable sets"
         logger.error(error_msg)
         return {"success": False, "error": error_msg}
+    return execute_command(query, batch=rows, conn=conn)
+
+@_needs_db
+def list_tables(conn=None):
+    """List all tables in the connected database"""
+    cache_key = (db_config['database'],)
+    tables = schema_cache_get(cache_key)
+    if tables is not None:
+        logger.info("Retrieved %s tables from cache", len(tables))
+        return {"success": True, "tables": tables}
     
     try:
-        cursor = db_connection.cursor()
+        if conn is None:
+            conn = _get_conn()
+        cursor = _shared_cursor(conn)
         cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in cursor.fetchall()]
-        cursor.close()
+        tables = [table[0] for table in _fetch_all(cursor)]
+        schema_cache_put(cache_key, tables)
         
-        logger.info(f"Retrieved {len(tables)} tables from database")
+        logger.info("Retrieved %s tables from database", len(tables))
         return {"success": True, "tables": tables}
     except Error as e:
-        logger.error(f"Error listing tables: {e}")
+        logger.error("Error listing tables: %s", e)
         return {"success": False, "error": str(e)}
 
-def describe_table(table_name):
+@_needs_db
+def describe_table(table_name, conn=None):
     """Get the structure of a table"""
-    global db_connection
+    try:
+        statement = describe_statement(table_name)
+    except ValueError as e:
+        logger.error("Error describing table: %s", e)
+        return {"success": False, "error": str(e)}
     
-    if not db_connection:
-        error_msg = "Database not connected. Use connect_db first."
-        logger.error(error_msg)
-        return {"success": False, "error": error_msg}
+    cache_key = (db_config['database'], table_name)
+    structure = schema_cache_get(cache_key)
+    if structure is not None:
+        logger.info("Retrieved structure for table %s from cache", table_name)
+        return {"success": True, "structure": structure}
     
     try:
-        cursor = db_connection.cursor(dictionary=True)
-        cursor.execute(f"DESCRIBE {table_name}")
-        structure = cursor.fetchall()
-        cursor.close()
+        if conn is None:
+            conn = _get_conn()
+        cursor = _shared_cursor(conn)
+        cursor.execute(statement)
+        columns = cursor.column_names
+        structure = [dict(zip(columns, row)) for row in _fetch_all(cursor)]
+        schema_cache_put(cache_key, structure)
         
-        logger.info(f"Retrieved structure for table {table_name}")
+        logger.info("Retrieved structure for table %s", table_name)
         return {"success": True, "structure": structure}
     except Error as e:
-        logger.error(f"Error describing table {table_name}: {e}")
+        logger.error("Error describing table %s: %s", table_name, e)
         return {"success": False, "error": str(e)}
 
-def handle_request(request):
-    """Handle incoming JSON-RPC requests"""
-    global last_activity_time, initialized
-    
-    # Update last activity time to prevent timeout
-    last_activity_time = time.time()
+def stream_response(request_id, chunks):
+    """Serialize a tool response whose results arrive in chunks, yielding bytes.
     
+    success is written after the results so an error hit mid-stream can still be reported.
+    """
+    yield b'{"jsonrpc":"2.0","id":' + json_dumps(request_id) + b',"result":{"results":['
     try:
-        # Parse JSON request
-        parsed_request = json.loads(request)
-        request_id = parsed_request.get('id')
-        method = parsed_request.get('method')
-        params = parsed_request.get('params', {})
-        
-        logger.info(f"Received request: method={method}, id={request_id}")
-        
-        # Handle initialization request
-        if method == 'initialize':
-            logger.info("Processing initialize request")
-            initialized = True
-            
-            # Return server capabilities
-            return {
+        separator = b""
+        for chunk in chunks:
+            if chunk:
+                # Serialize the chunk as a list and drop its brackets
+                yield separator + json_dumps(chunk)[1:-1]
+                separator = b","
+        yield b'],"success":true}}'
+    except Exception as e:
+        logger.error("Error streaming query results: %s", e, exc_info=LOG_DEBUG)
+        yield b'],"success":false,"error":' + json_dumps(str(e)) + b'}}'
+
+def page_response(request_id, pages):
+    """Send each page of a paged query as a $/partialResult notification and return the final response"""
+    row_count = 0
+    # A notification in a batch gets nothing back; its rows are only read off the connection
+    silent = getattr(_local, 'in_notification', False)
+    try:
+        for rows in pages:
+            row_count += len(rows)
+            if silent:
+                continue
+            write_message(json_dumps({
                 'jsonrpc': '2.0',
-                'id': request_id,
-                'result': {
-                    'capabilities': {
-                        'textDocumentSync': 1,
-                        'completionProvider': {
-                            'resolveProvider': True,
-                            'triggerCharacters': ['.']
-                        },
-                        'hoverProvider': True
+                'method': '$/partialResult',
+                'params': {
+                    'id': request_id,
+                    'results': rows
+                }
+            }))
+        result = {"success": True, "row_count": row_count}
+    except Exception as e:
+        logger.error("Error paging query results: %s", e, exc_info=LOG_DEBUG)
+        result = {"success": False, "error": str(e), "row_count": row_count}
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'result': result
+    }
+
+# Tool descriptors returned by MCP/listTools; built once and shared by every response
+LIST_TOOLS_RESULT = {
+    'tools': {
+        'connect_db': {
+            'description': 'Connect to a MySQL database',
+            'parameters': {
+                'properties': {
+                    'host': {
+                        'type': 'string',
+                        'description': 'Database host',
+                        'default': 'localhost'
+                    },
+                    'user': {
+                        'type': 'string',
+                        'description': 'Database username'
+                    },
+                    'password': {
+                        'type': 'string',
+                        'description': 'Database password',
+                        'format': 'password'
                     },
-                    'serverInfo': {
-                        'name': 'mysql-aqara',
-                        'version': '1.0.0'
+                    'database': {
+                        'type': 'string',
+                        'description': 'Database name (optional)'
                     }
-                }
+                },
+                'required': ['host', 'user', 'password']
             }
-            
-        # Handle shutdown request
-        elif method == 'shutdown':
-            logger.info("Processing shutdown request")
-            return {
-                'jsonrpc': '2.0',
-                'id': request_id,
-                'result': None
+        },
+        'create_or_modify_table': {
+            'description': 'Create a new table or modify an existing table schema',
+            'parameters': {
+                'properties': {
+                    'query': {
+                        'type': 'string',
+                        'description': 'CREATE TABLE or ALTER TABLE SQL query; several statements separated by ; are sent in one round trip but are not atomic, so if one fails the statements before it stay applied'
+                    },
+                    'bind_vars': {
+                        'type': 'object',
+                        'description': 'Optional bind variables for parameterized queries'
+                    }
+                },
+                'required': ['query']
             }
-            
-        # Handle exit notification
-        elif method == 'exit':
-            logger.info("Received exit notification, shutting down...")
-            cleanup()
-            sys.exit(0)
-            
-        # Handle MCP/listTools request
-        elif method == 'MCP/listTools':
-            logger.info("Processing MCP/listTools request")
-            return {
-                'jsonrpc': '2.0',
-                'id': request_id,
-                'result': {
-                    'tools': {
-                        'connect_db': {
-                            'description': 'Connect to a MySQL database',
-                            'parameters': {
-                                'properties': {
-                                    'host': {
-                                        'type': 'string',
-                                        'description': 'Database host',
-                                        'default': 'localhost'
-                                    },
-                                    'user': {
-                                        'type': 'string',
-                                        'description': 'Database username'
-                                    },
-                                    'password': {
-                                        'type': 'string',
-                                        'description': 'Database password',
-                                        'format': 'password'
-                                    },
-                                    'database': {
-                                        'type': 'string',
-                                        'description': 'Database name (optional)'
-                                    }
-                                },
-                                'required': ['host', 'user', 'password']
-                            }
-                        },
-                        'create_or_modify_table': {
-                            'description': 'Create a new table or modify an existing table schema',
-                            'parameters': {
-                                'properties': {
-                                    'query': {
-                                        'type': 'string',
-                                        'description': 'CREATE TABLE or ALTER TABLE SQL query'
-                                    },
-                                    'bind_vars': {
-                                        'type': 'object',
-                                        'description': 'Optional bind variables for parameterized queries'
-                                    }
-                                },
-                                'required': ['query']
-                            }
-                        },
-                        'query': {
-                            'description': 'Execute a SELECT query',
-                            'parameters': {
-                                'properties': {
-                                    'query': {
-                                        'type': 'string',
-                                        'description': 'SELECT SQL query'
-                                    },
-                                    'bind_vars': {
-                                        'type': 'object',
-                                        'description': 'Optional bind variables for parameterized queries'
-                                    }
-                                },
-                                'required': ['query']
-                            }
-                        },
-                        'execute': {
-                            'description': 'Execute INSERT, UPDATE, or DELETE query',
-                            'parameters': {
-                                'properties': {
-                                    'query': {
-                                        'type': 'string',
-                                        'description': 'SQL query (INSERT, UPDATE, DELETE)'
-                                    },
-                                    'bind_vars': {
-                                        'type': 'object',
-                                        'description': 'Optional bind variables for parameterized queries'
-                                    }
-                                },
-                                'required': ['query']
-                            }
-                        },
-                        'list_tables': {
-                            'description': 'List all tables in the connected database',
-                            'parameters': {
-                                'properties': {}
-                            }
-                        },
-                        'describe_table': {
-                            'description': 'Get the structure of a table',
-                            'parameters': {
-                                'properties': {
-                                    'table_name': {
-                                        'type': 'string',
-                                        'description': 'Name of the table to describe'
-                                    }
-                                },
-                                'required': ['table_name']
-                            }
-                        }
+        },
+        'query': {
+            'description': 'Execute a SELECT query',
+            'parameters': {
+                'properties': {
+                    'query': {
+                        'type': 'string',
+                        'description': 'SELECT SQL query'
+                    },
+                    'bind_vars': {
+                        'type': ['object', 'array'],
+                        'description': 'Optional bind variables for parameterized queries (arrays, and objects for %(name)s placeholders, run as cached prepared statements)'
+                    },
+                    'params': {
+                        'type': 'array',
+                        'description': 'Positional parameters for the query; alias for an array bind_vars'
+                    },
+                    'stream': {
+                        'type': 'boolean',
+                        'description': 'Stream rows from the server in chunks instead of loading the whole result set into memory (for large results)'
+                    },
+                    'page_size': {
+                        'type': 'integer',
+                        'description': 'Send rows as $/partialResult notifications of this many rows each, followed by a final response with the row count'
                     }
-                }
+                },
+                'required': ['query']
             }
-            
-        # Handle MCP/callTool request
-        elif method == 'MCP/callTool':
-            logger.info(f"Processing MCP/callTool request: {params}")
-            
-            tool_name = params.get('tool')
-            tool_params = params.get('parameters', {})
-            
-            # Execute the appropriate tool based on name
-            result = None
-            if tool_name == 'connect_db':
-                result = connect_db(
-                    host=tool_params.get('host', 'localhost'),
-                    user=tool_params.get('user', ''),
-                    password=tool_params.get('password', ''),
-                    database=tool_params.get('database', '')
-                )
-            elif tool_name == 'create_or_modify_table':
-                result = create_or_modify_table(
-                    query=tool_params.get('query', ''),
-                    bind_vars=tool_params.get('bind_vars')
-                )
-            elif tool_name == 'query':
-                result = execute_query(
-                    query=tool_params.get('query', ''),
-                    bind_vars=tool_params.get('bind_vars')
-                )
-            elif tool_name == 'execute':
-                result = execute_command(
-                    query=tool_params.get('query', ''),
-                    bind_vars=tool_params.get('bind_vars')
-                )
-            elif tool_name == 'list_tables':
-                result = list_tables()
-            elif tool_name == 'describe_table':
-                result = describe_table(
-                    table_name=tool_params.get('table_name', '')
-                )
-            else:
-                error_msg = f"Unknown tool: {tool_name}"
-                logger.error(error_msg)
-                return {
-                    'jsonrpc': '2.0',
-                    'id': request_id,
-                    'error': {
-                        'code': -32601,
-                        'message': error_msg
+        },
+        'execute': {
+            'description': 'Execute INSERT, UPDATE, or DELETE query',
+            'parameters': {
+                'properties': {
+                    'query': {
+                        'type': 'string',
+                        'description': 'SQL query (INSERT, UPDATE, DELETE)'
+                    },
+                    'bind_vars': {
+                        'type': ['object', 'array'],
+                        'description': 'Optional bind variables for parameterized queries (arrays, and objects for %(name)s placeholders, run as cached prepared statements)'
+                    },
+                    'params': {
+                        'type': 'array',
+                        'description': 'Positional parameters for the query; alias for an array bind_vars'
+                    },
+                    'batch': {
+                        'type': 'array',
+                        'description': 'Optional list of bind variable sets; runs the query once per entry in a single round trip (recommended for bulk loads)'
                     }
-                }
-            
-            logger.info(f"Tool {tool_name} execution completed with success={result.get('success', False)}")
-            return {
+                },
+                'required': ['query']
+            }
+        },
+        'execute_many': {
+            'description': 'Execute an INSERT, UPDATE, or DELETE query once per row in a single round trip',
+            'parameters': {
+                'properties': {
+                    'query': {
+                        'type': 'string',
+                        'description': 'SQL query with %s placeholders (INSERT, UPDATE, DELETE)'
+                    },
+                    'rows': {
+                        'type': 'array',
+                        'description': 'List of bind variable sets, one per row; INSERT ... VALUES is sent as one multi-row insert'
+                    }
+                },
+                'required': ['query', 'rows']
+            }
+        },
+        'list_tables': {
+            'description': 'List all tables in the connected database',
+            'parameters': {
+                'properties': {}
+            }
+        },
+        'describe_table': {
+            'description': 'Get the structure of a table',
+            'parameters': {
+                'properties': {
+                    'table_name': {
+                        'type': 'string',
+                        'description': 'Name of the table to describe'
+                    }
+                },
+                'required': ['table_name']
+            }
+        }
+    }
+}
+
+# The whole MCP/listTools response is constant apart from the id
+LIST_TOOLS_RESPONSE = response_template(LIST_TOOLS_RESULT)
+
+# Tool name -> handler taking the tool parameters
+TOOLS = {
+    'connect_db': lambda params: connect_db(
+        host=params.get('host', 'localhost'),
+        user=params.get('user', ''),
+        password=params.get('password', ''),
+        database=params.get('database', '')
+    ),
+    'create_or_modify_table': lambda params: create_or_modify_table(
+        query=params.get('query', ''),
+        bind_vars=params.get('bind_vars')
+    ),
+    'query': lambda params: execute_query(
+        query=params.get('query', ''),
+        bind_vars=params.get('bind_vars', params.get('params')),
+        stream=params.get('stream', False),
+        page_size=params.get('page_size')
+    ),
+    'execute': lambda params: execute_command(
+        query=params.get('query', ''),
+        bind_vars=params.get('bind_vars', params.get('params')),
+        batch=params.get('batch')
+    ),
+    'execute_many': lambda params: execute_many(
+        query=params.get('query', ''),
+        rows=params.get('rows')
+    ),
+    'list_tables': lambda params: list_tables(),
+    'describe_table': lambda params: describe_table(
+        table_name=params.get('table_name', '')
+    )
+}
+
+# Successful results of these tools are {"success": true, <key>: payload}; their responses
+# are written around pre-encoded bytes so only the id and payload get serialized
+RESULT_TEMPLATES = {
+    tool_name: (key, b',"result":{"success":true,"' + key.encode('ascii') + b'":')
+    for tool_name, key in (
+        ('list_tables', 'tables'),
+        ('describe_table', 'structure'),
+        ('execute', 'affected_rows'),
+        ('execute_many', 'affected_rows')
+    )
+}
+
+def run_tool(request_id, tool_name, handler, tool_params):
+    """Run a tool handler and build its JSON-RPC response"""
+    result = handler(tool_params)
+    logger.info("Tool %s execution completed with success=%s", tool_name, result.get('success', False))
+    if isinstance(result.get('results'), types.GeneratorType):
+        return stream_response(request_id, result['results'])
+    if isinstance(result.get('pages'), types.GeneratorType):
+        return page_response(request_id, result['pages'])
+    template = RESULT_TEMPLATES.get(tool_name)
+    if template is not None and result.get('success') is True and len(result) == 2:
+        key, prefix = template
+        return b'{"jsonrpc":"2.0","id":' + json_dumps(request_id) + prefix + json_dumps(result[key]) + b'}}'
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'result': result
+    }
+
+def process_tool_call(request_id, tool_name, handler, tool_params):
+    """Run a tool on a worker thread and write its response"""
+    try:
+        send_response(run_tool(request_id, tool_name, handler, tool_params))
+    except Exception as e:
+        logger.exception("Unexpected error running tool %s: %s", tool_name, e)
+        send_response(error_response(request_id, -32603, f"Internal error: {str(e)}"))
+
+def _end_batch_transaction():
+    """Commit the transaction of the JSON-RPC batch that ran on this thread.
+    
+    Returns the error message when the commit failed and the writes were rolled back.
+    """
+    conn = getattr(_local, 'conn', None)
+    _local.pending_writes = 0
+    if conn is None or not conn.in_transaction:
+        return None
+    try:
+        conn.commit()
+    except Error as e:
+        logger.error("Error committing batch: %s", e)
+        try:
+            conn.rollback()
+        except Error:
+            pass
+        return str(e)
+    return None
+
+def batch_response(entries):
+    """Run the entries of a JSON-RPC batch in order and serialize their responses as one array.
+    
+    The entries run on this thread's connection and their writes are committed
+    together before the array is built. Returns None when every entry is a notification.
+    """
+    responses = []
+    writes = []  # (index in responses, id) of the entries that wrote
+    _local.in_batch = True
+    _local.pending_writes = 0
+    try:
+        for entry in entries:
+            if not isinstance(entry, dict):
+                responses.append(INVALID_REQUEST_RESPONSE)
+                continue
+            pending_writes = _local.pending_writes
+            _local.in_notification = 'id' not in entry
+            response = handle_request(entry, defer=False)
+            if isinstance(response, types.GeneratorType):
+                # Drain streamed results before the next entry reuses the connection,
+                # notifications included
+                response = b"".join(response)
+            # Notifications get no entry in the batch response
+            if 'id' not in entry or response is None:
+                continue
+            if not isinstance(response, bytes):
+                response = json_dumps(response)
+            if _local.pending_writes > pending_writes:
+                writes.append((len(responses), entry['id']))
+            responses.append(response)
+    finally:
+        _local.in_batch = False
+        _local.in_notification = False
+        commit_error = _end_batch_transaction()
+    
+    if commit_error is not None:
+        # The writes were rolled back, so they can't be reported as successful
+        for index, request_id in writes:
+            responses[index] = json_dumps({
                 'jsonrpc': '2.0',
                 'id': request_id,
-                'result': result
-            }
-            
-        # Handle unknown method
-        else:
+                'result': {"success": False, "error": f"Batch commit failed: {commit_error}"}
+            })
+    if not responses:
+        return None
+    return b"[" + b",".join(responses) + b"]"
+
+def process_batch(entries):
+    """Run a JSON-RPC batch on a worker thread and write its response"""
+    try:
+        response = batch_response(entries)
+        if response is not None:
+            write_message(response)
+    except Exception as e:
+        logger.exception("Unexpected error running batch: %s", e)
+        send_response(error_response(None, -32603, f"Internal error: {str(e)}"))
+
+def handle_batch(entries):
+    """Handle a JSON-RPC batch, answering all of its entries with a single array"""
+    if not entries:
+        return error_response(None, -32600, "Invalid Request: empty batch")
+    
+    # Batches run on one worker, except those that replace the pool or stop the server
+    # (connect_db, exit), which run inline like a single request so later requests see it
+    if executor is not None and not any(
+        isinstance(entry, dict) and (
+            entry.get('method') == 'exit'
+            or (entry.get('method') == 'MCP/callTool'
+                and isinstance(entry.get('params'), dict)
+                and entry['params'].get('tool') == 'connect_db'))
+        for entry in entries
+    ):
+        return functools.partial(process_batch, entries)
+    try:
+        return batch_response(entries)
+    finally:
+        # Borrowed from the pool's spare connection; workers keep all the others
+        _release_conn()
+
+def handle_initialize(request_id, params, defer):
+    """Handle the initialize request"""
+    global initialized
+    logger.info("Processing initialize request")
+    initialized = True
+    
+    # Return server capabilities
+    return constant_response(INITIALIZE_RESPONSE, request_id)
+
+def handle_shutdown(request_id, params, defer):
+    """Handle the shutdown request"""
+    logger.info("Processing shutdown request")
+    return constant_response(SHUTDOWN_RESPONSE, request_id)
+
+def handle_exit(request_id, params, defer):
+    """Handle the exit notification"""
+    global running
+    logger.info("Received exit notification, shutting down...")
+    running = False
+    stop_event.set()
+    # Workers may still be using pooled connections; let them finish before closing those
+    if executor is not None:
+        executor.shutdown(wait=True)
+    cleanup()
+    sys.exit(0)
+
+def handle_list_tools(request_id, params, defer):
+    """Handle the MCP/listTools request"""
+    logger.info("Processing MCP/listTools request")
+    return constant_response(LIST_TOOLS_RESPONSE, request_id)
+
+def handle_call_tool(request_id, params, defer):
+    """Handle the MCP/callTool request"""
+    logger.info("Processing MCP/callTool request: %s", params)
+    
+    tool_name = params.get('tool')
+    tool_params = params.get('parameters') or EMPTY_PARAMS
+    
+    # Look up the tool handler
+    handler = TOOLS.get(tool_name)
+    if handler is None:
+        error_msg = f"Unknown tool: {tool_name}"
+        logger.error(error_msg)
+        return error_response(request_id, -32601, error_msg)
+    
+    # connect_db runs inline so requests after it see the new pool; other tools
+    # run on the worker threads, overlapping their MySQL round trips
+    if not defer or executor is None or tool_name == 'connect_db':
+        return run_tool(request_id, tool_name, handler, tool_params)
+    return functools.partial(process_tool_call, request_id, tool_name, handler, tool_params)
+
+# JSON-RPC method -> handler taking (request_id, params, defer)
+METHOD_HANDLERS = {
+    'initialize': handle_initialize,
+    'shutdown': handle_shutdown,
+    'exit': handle_exit,
+    'MCP/listTools': handle_list_tools,
+    'MCP/callTool': handle_call_tool
+}
+
+def handle_request(request, defer=True):
+    """Handle incoming JSON-RPC requests.
+    
+    request is a raw request line or an already parsed batch entry. Returns the
+    response, or a functools.partial job for a worker thread, which sends the
+    response itself; defer=False runs tool calls inline instead.
+    """
+    global last_activity_time
+    
+    # Update last activity time to prevent timeout
+    last_activity_time = time.monotonic()
+    request_id = None
+    
+    try:
+        # Parse JSON request
+        parsed_request = request if isinstance(request, dict) else json_loads(request)
+        
+        # A JSON-RPC batch is answered with a single array
+        if isinstance(parsed_request, list):
+            return handle_batch(parsed_request)
+        
+        request_id = parsed_request.get('id')
+        method = parsed_request.get('method')
+        params = parsed_request.get('params') or EMPTY_PARAMS
+        
+        logger.info("Received request: method=%s, id=%s", method, request_id)
+        
+        # Look up the method handler
+        handler = METHOD_HANDLERS.get(method)
+        if handler is None:
             error_msg = f"Unknown method: {method}"
             logger.error(error_msg)
-            return {
-                'jsonrpc': '2.0',
-                'id': request_id,
-                'error': {
-                    'code': -32601,
-                    'message': error_msg
-                }
-            }
+            return error_response(request_id, -32601, error_msg)
+        return handler(request_id, params, defer)
             
     except json.JSONDecodeError as e:
-        logger.error(f"JSON parsing error: {e}", exc_info=True)
-        return {
-            'jsonrpc': '2.0',
-            'id': None,
-            'error': {
-                'code': -32700,
-                'message': f"Parse error: {str(e)}"
-            }
-        }
+        logger.error("JSON parsing error: %s", e, exc_info=LOG_DEBUG)
+        return error_response(None, -32700, f"Parse error: {str(e)}")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
-        return {
-            'jsonrpc': '2.0',
-            'id': request_id if 'request_id' in locals() else None,
-            'error': {
-                'code': -32603,
-                'message': f"Internal error: {str(e)}"
-            }
-        }
+        logger.exception("Unexpected error: %s", e)
+        return error_response(request_id, -32603, f"Internal error: {str(e)}")
+
+# Check for environment variables
+if all(k in os.environ for k in ['DB_HOST', 'DB_USER', 'DB_PASSWORD']):
+    logger.info("Found database connection parameters in environment variables")
+    logger.info("Using database: %s/%s as %s", os.environ['DB_HOST'], os.environ.get('DB_DATABASE') or 'None', os.environ['DB_USER'])
+    # Try to auto-connect if environment variables are set
+    if os.environ.get('DB_DATABASE'):  # Only if database name is provided
+        result = connect_db(
+            host=os.environ['DB_HOST'],
+            user=os.environ['DB_USER'],
+            password=os.environ['DB_PASSWORD'],
+            database=os.environ['DB_DATABASE']
+        )
+        if result['success']:
+            logger.info("Auto-connected to database using environment variables")
+        else:
+            logger.error("Failed to auto-connect to database: %s", result['error'])
+
+def send_response(response):
+    """Serialize and write a response returned by handle_request"""
+    # Streamed responses are serialized while they are written
+    if isinstance(response, types.GeneratorType):
+        write_stream(response)
+        if LOG_DEBUG:
+            logger.debug("Streamed response sent")
+        return
+    
+    # Constant responses arrive already serialized
+    if isinstance(response, bytes):
+        response_json = response
+    else:
+        response_json = json_dumps(response)
+    write_message(response_json)
+    if LOG_DEBUG:
+        logger.debug("Response sent: %r", response_json)
+
+def process_request(request, out=None):
+    """Handle one raw request line and send its response.
+    
+    With out, a serialized response is appended to it for the caller to write instead.
+    """
+    try:
+        if LOG_DEBUG:
+            logger.debug("Raw request: %r", request)
+        if out and request.startswith(b'['):
+            # A batch run inline can write $/partialResult pages while it runs, so replies
+            # already answered inline go out first
+            write_messages(out)
+            out.clear()
+        response = handle_request(request)
+        if isinstance(response, functools.partial):
+            if out:
+                # Replies already answered inline go out before the worker's can overtake them
+                write_messages(out)
+                out.clear()
+            executor.submit(response)
+        elif response is None or out is None or isinstance(response, types.GeneratorType):
+            if out:
+                # Flush ahead of a streamed response so it stays in request order
+                write_messages(out)
+                out.clear()
+            if response is not None:
+                send_response(response)
+        else:
+            out.append(response if isinstance(response, bytes) else json_dumps(response))
+    except Exception as e:
+        logger.exception("Unexpected error processing request: %s", e)
+        # Try to send an error response
+        try:
+            response = error_response(None, -32603, f"Internal error: {str(e)}")
+            if out is None:
+                write_message(response)
+            else:
+                out.append(response)
+        except:
+            pass
+
+class LineReader:
+    """Split raw chunks read from stdin into request lines"""
+    
+    def __init__(self):
+        # Holds a partial line until the rest of it is read
+        self.buffer = bytearray()
+    
+    def feed(self, chunk):
+        """Return the complete lines in chunk, keeping any trailing partial line"""
+        end = chunk.rfind(b"\n")
+        if end == -1:
+            self.buffer += chunk
+            return []
+        if self.buffer:
+            self.buffer += chunk[:end]
+            # As bytes, like the lines of every other read
+            lines = bytes(self.buffer).split(b"\n")
+        else:
+            lines = chunk[:end].split(b"\n")
+        self.buffer = bytearray(chunk[end + 1:])
+        return lines
+    
+    def flush(self):
+        """Return the unterminated last line, if any, at end of input"""
+        lines = [bytes(self.buffer)] if self.buffer else []
+        self.buffer = bytearray()
+        return lines
+
+def process_mapped_input(fd):
+    """Handle every request line of the regular file open on fd through a memory map"""
+    start = os.lseek(fd, 0, os.SEEK_CUR)
+    size = os.fstat(fd).st_size
+    if start >= size:
+        return
+    
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+        responses = []
+        try:
+            while start < size:
+                end = mapped.find(b"\n", start)
+                if end == -1:
+                    end = size
+                request = mapped[start:end].strip()
+                start = end + 1
+                if request:
+                    process_request(request, responses)
+        finally:
+            if responses:
+                write_messages(responses)
 
 def main():
     """Main function to run the server"""
-    global running
+    global running, executor
     
     # Register signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
+    # Close pooled connections even on an abnormal exit
+    atexit.register(cleanup)
+    
+    # Keep-alives are timed by select() on stdin; Windows can't select() on pipes,
+    # so it falls back to the keep-alive thread
+    use_select = os.name != 'nt'
+    if not use_select:
+        threading.Thread(target=_keep_alive_loop, name="mcp-keep-alive", daemon=True).start()
     
-    # Start keep-alive thread
-    keep_alive_thread = threading.Thread(target=keep_alive_thread, daemon=True)
-    keep_alive_thread.start()
+    # Each worker keeps one pooled connection checked out; the pool has one spare for the main thread
+    executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='mcp-worker')
     
     # Print startup message
     logger.info("MySQL MCP server started, waiting for messages...")
     
+    # Read raw bytes from the fd to skip TextIOWrapper decoding and newline translation
+    stdin_fd = sys.stdin.fileno()
+    reader = LineReader()
+    
+    # Register stdin once rather than rebuilding the fd lists on every select() call
+    selector = None
+    if use_select:
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(stdin_fd, selectors.EVENT_READ)
+        except PermissionError:
+            # epoll rejects regular files, which never block on read anyway
+            selector.close()
+            selector = None
+    
+    # A regular file is mapped and split in place instead of read in chunks
+    if selector is None and stat.S_ISREG(os.fstat(stdin_fd).st_mode):
+        process_mapped_input(stdin_fd)
+        logger.warning("End of input stream detected. Exiting...")
+        running = False
+    
     # Main loop to read requests from stdin
     while running:
         try:
-            # Read a line from stdin
-            request = sys.stdin.readline()
+            if selector is not None:
+                # Block until input arrives or the keep-alive is due
+                elapsed = time.monotonic() - last_activity_time
+                if elapsed >= KEEP_ALIVE_INTERVAL or not selector.select(KEEP_ALIVE_INTERVAL - elapsed):
+                    logger.info("Sending keep-alive after %.1fs of inactivity", time.monotonic() - last_activity_time)
+                    send_keep_alive()
+                    continue
+            
+            # Read whatever is available from stdin
+            chunk = os.read(stdin_fd, 65536)
             
             # Check if stdin is closed
-            if not request:
+            if not chunk:
                 logger.warning("End of input stream detected. Exiting...")
                 running = False
-                break
-                
-            # Handle empty lines
-            request = request.strip()
-            if not request:
-                continue
-                
-            # Process the request
-            logger.debug(f"Raw request: {request}")
-            response = handle_request(request)
+                # The last request may not end with a newline
+                lines = reader.flush()
+            else:
+                lines = reader.feed(chunk)
             
-            # Send the response
-            response_json = json.dumps(response)
-            print(response_json, flush=True)
-            logger.debug(f"Response sent: {response_json}")
+            # Responses answered inline are written together once the chunk is handled
+            responses = []
+            try:
+                for request in lines:
+                    # Handle empty lines
+                    request = request.strip()
+                    if request:
+                        process_request(request, responses)
+            finally:
+                if responses:
+                    write_messages(responses)
             
         except KeyboardInterrupt:
             logger.info("Keyboard interrupt received, exiting...")
             running = False
             break
         except Exception as e:
-            logger.error(f"Unexpected error in main loop: {e}", exc_info=True)
-            # Try to send an error response
-            try:
-                error_response = {
-                    'jsonrpc': '2.0',
-                    'id': None,
-                    'error': {
-                        'code': -32603,
-                        'message': f"Internal error: {str(e)}"
-                    }
-                }
-                print(json.dumps(error_response), flush=True)
-            except:
-                pass
+            logger.exception("Unexpected error in main loop: %s", e)
+    
+    stop_event.set()
+    if selector is not None:
+        selector.close()
     
-    # Cleanup before exit
+    # Let in-flight tool calls finish, then cleanup before exit
+    executor.shutdown(wait=True)
     cleanup()
 
 if __name__ == "__main__":